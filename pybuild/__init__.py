@@ -0,0 +1,33 @@
+"""PyBuild, a build environment for Python that starts from the virtual environment upwards.
+
+    Modules are imported on first access, ```import pybuild``` alone imports nothing. External modules registered through
+    the pybuild.modules entry point group (see pybuild.plugins) are reachable the same way.
+
+    ```
+    import pybuild
+
+    pybuild.pip.install(environment, 'numpy')
+    ```
+
+"""
+import importlib
+
+# Modules shipped with PyBuild, these take precedence over external modules of the same name.
+_MODULES = ['daemon', 'environment', 'git', 'lock', 'matrix', 'pdoc', 'pip', 'plugins', 'pyinstaller', 'utils', 'virtualenv']
+
+
+def __getattr__(name):
+    if name.startswith('__'):
+        raise AttributeError(f'module \'pybuild\' has no attribute \'{name}\'')
+    if name in _MODULES:
+        module = importlib.import_module(f'pybuild.{name}')
+    else:
+        from pybuild import plugins
+        module = plugins.load(name)
+    globals()[name] = module
+    return module
+
+
+def __dir__():
+    from pybuild import plugins
+    return sorted(set(globals()) | set(_MODULES) | set(plugins.discover()))
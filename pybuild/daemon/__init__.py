@@ -0,0 +1,171 @@
+"""Optional PyBuild daemon that keeps warm pip workers around between calls.
+
+    Every pip call made by PyBuild starts a new interpreter which pays for the pip imports before any work is done, build
+    scripts that make hundreds of these calls spend most of their time importing. The daemon listens on a Unix socket and
+    keeps one warm worker interpreter per environment, pip operations are then run inside of the worker.
+
+    Operations which modify an environment (install, uninstall, ...) are serialized per environment while read-only
+    queries (freeze, list, show, ...) run alongside each other. Operations on different environments never wait on each other.
+
+    The daemon is entirely optional, ```pybuild.pip``` will send its work to the daemon when one is listening and will
+    otherwise fall back to creating processes as it always has.
+
+    Basic Usage:
+
+    ```python -m pybuild.daemon```
+
+    or from a build script
+
+    ```
+    from pybuild.daemon import server
+
+    server.serve()
+    ```
+
+    The socket is kept inside a directory only the current user may access, $XDG_RUNTIME_DIR/pybuild when available
+    else a per user directory inside the temporary directory. The location may be changed through the PYBUILD_DAEMON_SOCKET
+    environment variable. A socket, or a daemon behind it, belonging to another user is never trusted.
+"""
+import json
+import logging
+import os
+import pathlib
+import socket
+import struct
+import tempfile
+
+from typing import List, Optional, Tuple, Union
+
+# pip commands which never modify the environment they are run against.
+READ_ONLY_COMMANDS = {'check', 'debug', 'download', 'freeze', 'hash', 'help', 'index', 'inspect', 'list', 'search', 'show'}
+
+
+def read_only(args : List[str]) -> bool:
+    """Checks whether pip arguments leave the environment untouched, install --dry-run only resolves.
+
+    Args:
+        args: pip arguments, example ['install', 'numpy'].
+
+    Returns:
+        True if the operation doesn't modify the environment else False.
+    """
+    if not args:
+        return False
+    return args[0] in READ_ONLY_COMMANDS or (args[0] == 'install' and '--dry-run' in args)
+
+
+def socket_path() -> pathlib.Path:
+    """Location of the daemon socket.
+
+    Returns:
+        Path from PYBUILD_DAEMON_SOCKET if set, else a socket inside the private directory of the user.
+    """
+    if 'PYBUILD_DAEMON_SOCKET' in os.environ:
+        return pathlib.Path(os.environ['PYBUILD_DAEMON_SOCKET'])
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        return pathlib.Path(os.environ['XDG_RUNTIME_DIR'], 'pybuild', 'daemon.sock')
+    return pathlib.Path(tempfile.gettempdir(), f'pybuild-{os.getuid()}', 'daemon.sock')
+
+
+def trusted(path : pathlib.Path) -> bool:
+    """Checks that the socket and its directory belong to the current user and no other user may access the directory.
+
+    Args:
+        path: Socket location.
+
+    Returns:
+        True if the location may be trusted else False.
+    """
+    try:
+        directory, stat = os.stat(path.parent), os.stat(path)
+    except OSError:
+        return False
+    return directory.st_uid == os.getuid() and not directory.st_mode & 0o077 and stat.st_uid == os.getuid()
+
+
+def peer_uid(connection : socket.socket) -> Optional[int]:
+    """Retrieves the user id of the process on the other end of a Unix socket.
+
+    Returns:
+        User id of the peer, None when the platform doesn't support SO_PEERCRED.
+    """
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    _, uid, _ = struct.unpack('3i', connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i')))
+    return uid
+
+
+def _connect(path : pathlib.Path = None) -> Optional[socket.socket]:
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    path = path if path else socket_path()
+    if not path.exists():
+        return None
+    if not trusted(path):
+        logging.warning(f'Ignoring PyBuild daemon socket {path}, it or its directory is accessible by another user.')
+        return None
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(str(path))
+    except OSError:
+        connection.close()
+        return None
+    if peer_uid(connection) not in (None, os.getuid()):
+        logging.warning(f'Ignoring PyBuild daemon on {path}, it is run by another user.')
+        connection.close()
+        return None
+    return connection
+
+
+def available(path : pathlib.Path = None) -> bool:
+    """Checks whether a daemon is listening.
+
+    Args:
+        path: Socket location, default is socket_path().
+
+    Returns:
+        True if a daemon accepted a connection else False.
+    """
+    connection = _connect(path)
+    if connection is None:
+        return False
+    connection.close()
+    return True
+
+
+def request(python : Union[str, pathlib.Path], args : List[str], cwd : Union[str, pathlib.Path] = None,
+            path : pathlib.Path = None) -> Optional[Tuple[int, str, str]]:
+    """Sends a pip operation to the daemon.
+
+    pip runs with the environment variables of the caller (PIP_INDEX_URL, proxies, ...), as a process started by the caller would.
+
+    Args:
+        python: Interpreter of the environment the operation is run against.
+        args: pip arguments, example ['install', 'numpy'].
+        cwd: Working directory the operation is run from, default is the current working directory.
+        path: Socket location, default is socket_path().
+
+    Returns:
+        Tuple of return code, stdout and stderr of the operation.
+        None if no daemon is available or the daemon was unable to run the operation, the caller should fall back to a process.
+    """
+    connection = _connect(path)
+    if connection is None:
+        return None
+    message = {'python': str(pathlib.Path(python).absolute()), 'args': [str(x) for x in args], 'cwd': str(cwd if cwd else pathlib.Path.cwd()),
+               'env': dict(os.environ)}
+    try:
+        with connection, connection.makefile('rwb') as stream:
+            stream.write(json.dumps(message).encode('utf-8') + b'\n')
+            stream.flush()
+            line = stream.readline()
+    except OSError as error:
+        logging.debug(f'PyBuild daemon request failed, {error}.')
+        return None
+    if not line:
+        return None
+    response = json.loads(line)
+    if 'error' in response:
+        logging.debug(f'PyBuild daemon unable to run pip {" ".join(args)}, {response["error"]}.')
+        return None
+    return response['rc'], response['stdout'], response['stderr']
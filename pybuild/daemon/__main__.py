@@ -0,0 +1,6 @@
+import logging
+
+from pybuild.daemon import server
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+server.serve()
@@ -0,0 +1,346 @@
+"""Server side of the PyBuild daemon.
+
+    Accepts pip operations over the daemon socket and dispatches them to warm worker interpreters, see pybuild.daemon.worker.
+    Each environment keeps a small pool of workers. Operations modifying an environment hold that environment exclusively,
+    read-only queries share it and each run in a worker of their own.
+
+"""
+import json
+import logging
+import os
+import pathlib
+import socketserver
+import subprocess
+import threading
+import time
+
+from typing import Dict, List, Optional
+
+from pybuild import daemon
+
+
+class _ReadWriteLock:
+    """Allows any number of readers or a single writer, writers waiting block new readers from starving them."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+
+    def acquire_read(self):
+        with self._condition:
+            while self._writer or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+
+
+    def release_read(self):
+        with self._condition:
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+
+
+    def acquire_write(self):
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+
+
+    def release_write(self):
+        with self._condition:
+            self._writer = False
+            self._condition.notify_all()
+
+
+class _Worker:
+    """Warm interpreter for a single environment, see pybuild.daemon.worker. Runs one request at a time."""
+
+    def __init__(self, python : str):
+        """Starts the worker interpreter.
+
+        Args:
+            python: Interpreter of the environment.
+        """
+        self._process = subprocess.Popen([python, str(pathlib.Path(__file__).with_name('worker.py'))],
+                                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self._next_id = 0
+
+
+    def alive(self) -> bool:
+        return self._process.poll() is None
+
+
+    def run(self, args : List[str], cwd : str, env : Dict[str, str]) -> dict:
+        """Runs the pip arguments inside the worker, blocking until the worker responds.
+
+        Returns:
+            Response of the worker.
+        """
+        request_id, self._next_id = self._next_id, self._next_id + 1
+        try:
+            self._process.stdin.write(json.dumps({'id': request_id, 'args': args, 'cwd': cwd, 'env': env}).encode('utf-8') + b'\n')
+            self._process.stdin.flush()
+            line = self._process.stdout.readline()
+        except OSError as error:
+            return {'error': str(error)}
+        if not line:
+            return {'error': 'Worker exited.'}
+        return json.loads(line)
+
+
+    def close(self):
+        """Closes stdin of the worker and waits for it to exit, a request in progress always completes first."""
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        self._process.wait()
+
+
+def _identity(python : str) -> Optional[tuple]:
+    """Identifies the interpreter behind a path, changes once the environment is removed or stood up again.
+
+    Returns:
+        Resolved location, link and target inodes and modification time of the interpreter, None when it doesn't exist.
+    """
+    try:
+        link, target = os.lstat(python), os.stat(python)
+    except OSError:
+        return None
+    return os.path.realpath(python), link.st_ino, target.st_ino, target.st_mtime_ns
+
+
+class _Pool:
+    """Workers of a single environment along with the lock guarding that environment."""
+
+    def __init__(self, python : str, size : int):
+        """Initialization function of the class.
+
+        Args:
+            python: Interpreter of the environment.
+            size: Maximum number of workers, only reached when read-only queries run alongside each other.
+        """
+        self.lock = _ReadWriteLock()
+        self.identity = _identity(python)
+        self.closed = False
+        self.active = 0
+        self.last_used = time.monotonic()
+        self._python = python
+        self._size = size
+        self._condition = threading.Condition()
+        self._workers = [] # type: List[_Worker]
+        self._idle = [] # type: List[_Worker]
+
+
+    def acquire(self) -> _Worker:
+        """Takes an idle worker, starting a new one while the pool isn't full."""
+        with self._condition:
+            while True:
+                for worker in [x for x in self._idle if not x.alive()]:
+                    self._idle.remove(worker)
+                    self._workers.remove(worker)
+                if self._idle:
+                    return self._idle.pop()
+                if len(self._workers) < self._size:
+                    worker = _Worker(self._python)
+                    self._workers.append(worker)
+                    return worker
+                self._condition.wait()
+
+
+    def release(self, worker : _Worker, retire : bool = False):
+        """Returns a worker to the pool.
+
+        Args:
+            worker: Worker taken through acquire.
+            retire: Close the worker instead, it failed a request or runs a pip which changed on disk.
+        """
+        with self._condition:
+            if worker.alive() and not retire:
+                self._idle.append(worker)
+            else:
+                self._workers.remove(worker)
+            self._condition.notify()
+        if retire:
+            worker.close()
+
+
+    def close(self):
+        """Closes every worker, the caller must hold the lock exclusively so no worker is in use."""
+        with self._condition:
+            workers, self._workers, self._idle = self._workers, [], []
+        for worker in workers:
+            worker.close()
+
+
+    def retire(self):
+        """Waits for operations in progress then closes every worker, the pool is never used again."""
+        self.lock.acquire_write()
+        try:
+            self.close()
+            self.closed = True
+        finally:
+            self.lock.release_write()
+
+
+class _DaemonHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        if daemon.peer_uid(self.connection) not in (None, os.getuid()):
+            logging.warning('Refused PyBuild daemon connection from another user.')
+            return
+        line = self.rfile.readline()
+        if not line:
+            return
+        message = json.loads(line)
+        response = self.server.dispatch(message['python'], message['args'], message['cwd'], message.get('env'))
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+
+class Daemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server which dispatches pip operations to warm workers."""
+
+    daemon_threads = True
+
+    def __init__(self, path : pathlib.Path = None, workers : int = 4, idle_timeout : float = 300):
+        """Binds the daemon to its socket.
+
+        Args:
+            path: Socket location, default is pybuild.daemon.socket_path().
+            workers: Maximum number of workers per environment.
+            idle_timeout: Seconds an environment may go unused before its workers are stopped.
+
+        Raises:
+            OSError: Raised when another daemon is already listening on the socket or the socket directory may be
+                accessed by another user.
+        """
+        self.path = path if path else daemon.socket_path()
+        self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        directory = os.stat(self.path.parent)
+        if directory.st_uid != os.getuid() or directory.st_mode & 0o077:
+            raise OSError(f'PyBuild daemon directory {self.path.parent} must only be accessible by its owner.')
+        if self.path.exists():
+            if daemon.available(self.path):
+                raise OSError(f'PyBuild daemon already listening on {self.path}.')
+            self.path.unlink()
+        self._lock = threading.Lock()
+        self._size = workers
+        self._idle_timeout = idle_timeout
+        self._last_reap = time.monotonic()
+        self._closing = False
+        self._pools = {} # type: Dict[str, _Pool]
+        super().__init__(str(self.path), _DaemonHandler)
+        os.chmod(str(self.path), 0o600)
+
+
+    def _retire(self, pools : List[_Pool]):
+        """Retires pools in the background, operations in progress complete first."""
+        if pools:
+            threading.Thread(target=lambda: [x.retire() for x in pools], daemon=True).start()
+
+
+    def _pool(self, python : str) -> Optional[_Pool]:
+        """Retrieves the pool of an environment, replacing it when the interpreter behind the path changed.
+
+        Returns:
+            Pool with its active count raised, None when the interpreter doesn't exist or the daemon is closing.
+        """
+        identity = _identity(python)
+        with self._lock:
+            pool = self._pools.get(python)
+            if pool and pool.identity != identity:
+                # The environment was removed or stood up again, its workers run an interpreter which is gone.
+                del self._pools[python]
+                self._retire([pool])
+                pool = None
+            if self._closing or identity is None:
+                return None
+            if pool is None:
+                pool = self._pools[python] = _Pool(python, self._size)
+            pool.active += 1
+            return pool
+
+
+    def _done(self, pool : _Pool):
+        with self._lock:
+            pool.active -= 1
+            pool.last_used = time.monotonic()
+
+
+    def dispatch(self, python : str, args : List[str], cwd : str, env : Dict[str, str] = None) -> dict:
+        """Runs pip arguments against the environment owning the interpreter python.
+
+        Returns:
+            Response of the worker, see pybuild.daemon.worker.
+        """
+        read_only = daemon.read_only(args)
+        while True:
+            pool = self._pool(python)
+            if pool is None:
+                return {'error': f'Interpreter {python} not found or daemon closing.'}
+            try:
+                (pool.lock.acquire_read if read_only else pool.lock.acquire_write)()
+                try:
+                    # Retired while waiting on the lock, start over with the pool replacing it.
+                    if pool.closed:
+                        continue
+                    worker = pool.acquire()
+                    response = {}
+                    try:
+                        response = worker.run(args, cwd, env)
+                    finally:
+                        # A failing worker is replaced rather than handed the next request.
+                        pool.release(worker, retire='error' in response or bool(response.get('stale')))
+                    # pip itself changed on disk, every worker of the environment is running the pip it imported beforehand.
+                    if response.get('stale') and not read_only:
+                        pool.close()
+                    return response
+                finally:
+                    (pool.lock.release_read if read_only else pool.lock.release_write)()
+            finally:
+                self._done(pool)
+
+
+    def service_actions(self):
+        """Stops the workers of environments which went unused for idle_timeout or whose interpreter is gone."""
+        now = time.monotonic()
+        if now - self._last_reap < min(self._idle_timeout, 60):
+            return
+        self._last_reap = now
+        with self._lock:
+            expired = [k for k, v in self._pools.items()
+                       if not v.active and (now - v.last_used > self._idle_timeout or _identity(k) != v.identity)]
+            pools = [self._pools.pop(x) for x in expired]
+        self._retire(pools)
+
+
+    def server_close(self):
+        super().server_close()
+        with self._lock:
+            self._closing = True
+            pools, self._pools = list(self._pools.values()), {}
+        # Wait for operations in progress before stopping their workers.
+        for pool in pools:
+            pool.retire()
+        if self.path.exists():
+            self.path.unlink()
+
+
+def serve(path : pathlib.Path = None):
+    """Runs the daemon until interrupted.
+
+    Args:
+        path: Socket location, default is pybuild.daemon.socket_path().
+    """
+    with Daemon(path) as server:
+        logging.info(f'PyBuild daemon listening on {server.path}.')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,109 @@
+"""Warm worker interpreter used by the PyBuild daemon.
+
+    The worker is started by the daemon with the Python interpreter of an environment and is kept alive for as long as
+    the daemon runs, avoiding the import cost of pip on every call. It is deliberately standalone and only relies on the
+    standard library and pip, the interpreter it runs in may be a virtual environment which doesn't have PyBuild installed.
+
+    Requests and responses are single JSON lines passed over stdin and stdout respectively. A worker runs one request at
+    a time, pip isn't thread safe and both the working directory and environment variables are process wide. The daemon
+    starts additional workers for an environment when read-only queries should run alongside each other.
+
+    Request:
+
+    ```{"id": 0, "args": ["install", "numpy"], "cwd": "/home/pybuild", "env": {"PIP_INDEX_URL": "..."}}```
+
+    Response:
+
+    ```{"id": 0, "rc": 0, "stdout": "...", "stderr": "...", "stale": false}```
+
+    stale is set once pip itself was modified on disk, the imported pip no longer matches and the worker must be replaced.
+
+"""
+import contextlib
+import importlib
+import io
+import json
+import os
+import signal
+import sys
+
+
+def _pip_main():
+    """Retrieves the in-process pip entry point, the location has moved between pip releases."""
+    try:
+        from pip._internal.cli.main import main
+    except ImportError:
+        from pip._internal import main
+    return main
+
+
+def _pip_signature():
+    """Identifies the pip installation on disk, changes once pip is upgraded, reinstalled or removed."""
+    import pip
+    try:
+        stat = os.stat(pip.__file__)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def _run_pip(args, cwd, environ):
+    """Runs pip inside of this interpreter, capturing anything it would have printed.
+
+    pip runs with the working directory and environment variables of the client, exactly as a process started by the
+    client would have. Both are restored afterwards.
+    """
+    stdout, stderr = io.StringIO(), io.StringIO()
+    previous_cwd, previous_environ = os.getcwd(), dict(os.environ)
+    # Packages added or removed by an earlier request, possibly by another worker, should be visible.
+    importlib.invalidate_caches()
+    try:
+        if environ is not None:
+            os.environ.clear()
+            os.environ.update(environ)
+        if cwd:
+            os.chdir(cwd)
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                rc = _pip_main()(list(args))
+            except SystemExit as system_exit:
+                # Same as the interpreter would exit with, None is success and any other object a failure.
+                code = system_exit.code
+                rc = 0 if code is None else code if isinstance(code, int) else 1
+    finally:
+        os.chdir(previous_cwd)
+        os.environ.clear()
+        os.environ.update(previous_environ)
+    return rc or 0, stdout.getvalue(), stderr.getvalue()
+
+
+def main():
+    # Ctrl-C reaches the whole process group, the daemon decides when a worker stops so a pip installation in progress
+    # is never interrupted half way. The worker exits once stdin is closed and the current request has completed.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # Keep the protocol on its own descriptor, anything written straight to fd 1 (build backends, compilers) is sent
+    # to stderr instead of corrupting responses.
+    channel = os.fdopen(os.dup(sys.stdout.fileno()), 'w', encoding='utf-8')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    # Import pip up front, this is the cost the worker is kept warm for.
+    _pip_main()
+    signature = _pip_signature()
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        try:
+            rc, stdout, stderr = _run_pip(request.get('args', []), request.get('cwd'), request.get('env'))
+            response = {'id': request.get('id'), 'rc': rc, 'stdout': stdout, 'stderr': stderr,
+                        'stale': _pip_signature() != signature}
+        except Exception as error:
+            response = {'id': request.get('id'), 'error': f'{type(error).__name__}: {error}'}
+        channel.write(json.dumps(response) + '\n')
+        channel.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -22,24 +22,28 @@ import sys
 from tempfile import NamedTemporaryFile
 from typing import List, Union
 
-from pybuild import pip
-from pybuild.utils import file_utils, os_utils, process_utils
+from pybuild.utils import file_utils, os_utils
+
+# Lists the site-packages directories of an interpreter other than the one running PyBuild, same order as Environment.site_packages.
+_SITE_PACKAGES = 'import json, site; print(json.dumps(([site.getusersitepackages()] if site.ENABLE_USER_SITE else []) + site.getsitepackages()))'
 
 # TODO: Create snapshot=False argument where the environment
 # is saved and later restored after with context completes or
 # __del__ occurs.
 class Environment:
 
-    def __init__(self, env_name : str):
+    def __init__(self, env_name : str, interpreter : Union[str, pathlib.Path] = None):
         """Creates an Environment for PyBuild to run in.
 
         Environment initialization function.
 
         Args:
             env_name Environment name to operate in.
+            interpreter Python interpreter the environment starts from, default is sys.executable.
         """
         assert isinstance(env_name, str)
-        self.__interpreter = pathlib.Path(sys.executable)
+        self.__base_interpreter = pathlib.Path(interpreter if interpreter else sys.executable)
+        self.__interpreter = self.__base_interpreter
         self.__env_name = env_name
         self.__environment_path = pathlib.Path(env_name)
 
@@ -77,7 +81,7 @@ class Environment:
         Returns:
             Path reference to interpreter.
         """
-        if pathlib.Path(sys.executable) == self.__interpreter:
+        if self.__base_interpreter == self.__interpreter:
             if os_utils.get_os() == os_utils.SupportedOS.WINDOWS:
                 known_location = pathlib.Path(self.__environment_path, 'python.exe')
                 if known_location.exists():
@@ -108,6 +112,32 @@ class Environment:
             os_utils.remove_directory(str(self.__environment_path))
 
 
+    def diff(self, other : Union['Environment', str, pathlib.Path], verify : bool = False) -> 'dist_utils.EnvironmentDiff':
+        """Compares the distributions installed in this environment against another environment or a requirements file.
+
+        Distributions are read straight from the dist-info directories of site-packages, in parallel, no pip process is started.
+
+        Args:
+            other: Environment or requirements file (pip freeze output, pybuild.lock lockfile) to compare against.
+            verify: Verify the RECORD hashes of this environments distributions, catching tampered or partially installed files.
+
+        Returns:
+            EnvironmentDiff, added are installed here but not in other, removed are in other but not installed here,
+            changed maps to the (installed, other) versions and corrupted lists files failing verification.
+
+        Raises:
+            FileNotFoundError: When the requirements file wasn't able to be found.
+        """
+        from pybuild.utils import dist_utils
+
+        ours = dist_utils.scan(self.site_packages(), verify=verify)
+        if isinstance(other, Environment):
+            theirs = dist_utils.scan(other.site_packages())
+        else:
+            theirs = dist_utils.read_requirements(pathlib.Path(other))
+        return dist_utils.diff(ours, theirs)
+
+
     def executables(self) -> pathlib.Path:
         """Returns the listing of the environments executables (Scripts: Windows, bin: Linux)
 
@@ -155,11 +185,34 @@ class Environment:
     def python(self) -> pathlib.Path:
         """Grabs the Python interpreter located inside the environment.
         Returns:
-            The known location of the Python interpreter, by default sys.executable but may be changed later.
+            The known location of the Python interpreter, by default the interpreter the environment started from but may be changed later.
         """
         return self.__interpreter
 
 
+    def site_packages(self) -> List[pathlib.Path]:
+        """Returns the site-packages directories of the environment, in the order the interpreter searches them.
+
+        Returns:
+            List of existing site-packages directories.
+        """
+        if self.__interpreter == self.__base_interpreter:
+            # No virtual environment was stood up, the interpreter the environment started from is in use.
+            if self.__interpreter == pathlib.Path(sys.executable):
+                import site
+                directories = ([site.getusersitepackages()] if site.ENABLE_USER_SITE else []) + site.getsitepackages()
+            else:
+                import json, subprocess
+                directories = json.loads(subprocess.check_output([str(self.__interpreter), '-c', _SITE_PACKAGES], universal_newlines=True))
+            return [pathlib.Path(x) for x in directories if pathlib.Path(x).is_dir()]
+        if os_utils.get_os() == os_utils.SupportedOS.WINDOWS:
+            return [x for x in [pathlib.Path(self.__environment_path, 'Lib', 'site-packages')] if x.is_dir()]
+        elif os_utils.get_os() in [os_utils.SupportedOS.LINUX, os_utils.SupportedOS.MAC]:
+            return [x for x in sorted(self.__environment_path.glob('lib/python*/site-packages')) if x.is_dir()]
+        else:
+            raise os_utils.PyBuildOSError()
+
+
     def wipe(self) -> bool:
         """Wipes the entirety of the workspace of all installations.
 
@@ -172,6 +225,9 @@ class Environment:
         Raises:
             OSError if the environment is unable to be wiped. The process runs through pip
         """
+        # pip is only needed here, importing it with the module would slow down every import of Environment.
+        from pybuild import pip
+
         successful = False
         # Open a temporaryfile
         with NamedTemporaryFile(delete=False) as tmpfd:
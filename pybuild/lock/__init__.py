@@ -0,0 +1,184 @@
+"""Generates fully pinned lockfiles and installs from them.
+
+    pip.install hands loose specifications such as 'matplotlib>=1.0.0' to pip which resolves them from scratch on every run.
+    A lockfile pins every package of the resolution to an exact version along with the sha256 hash of the file pip selected,
+    installing from it skips the resolver entirely and is reproducible.
+
+    Resolutions are cached inside the PyBuild cache (see file_utils.cache_directory) keyed by the specification set, the
+    platform and the interpreter of the environment, locking the same specifications again doesn't resolve anything.
+
+    Basic Usage:
+
+    ```
+    from pybuild import lock
+
+    with Environment('pybuildenv') as environment:
+        VirtualEnv(environment)
+        lockfile = lock.lock(environment, ['matplotlib>=1.0.0', 'numpy'])
+        lock.install_locked(environment, lockfile)
+    ```
+
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Iterable, List, Union
+
+from pybuild import pip
+from pybuild.utils import file_utils, process_utils
+
+# Environment markers a resolution depends on, the lockfile is only valid where these match.
+_MARKERS = ['implementation_name', 'python_version', 'sys_platform', 'platform_machine']
+
+# Interpreter identity used when keying the resolution cache.
+_INTERPRETER_TAG = 'import sys, sysconfig; print(sys.implementation.name, "%d.%d.%d" % sys.version_info[:3], sysconfig.get_platform())'
+
+
+def _interpreter_tag(environment) -> str:
+    """Identifies the interpreter and platform of the environment.
+
+    Returns:
+        Implementation, version and platform of the environments interpreter, example 'cpython 3.11.7 linux-x86_64'.
+    """
+    return subprocess.check_output([str(environment.python()), '-c', _INTERPRETER_TAG], universal_newlines=True).strip()
+
+
+def _compatible(tag : str) -> str:
+    """Drops the patch version from an interpreter tag, a lockfile is valid for every patch release of the interpreter."""
+    implementation, version, platform = tag.split(' ', 2)
+    return ' '.join([implementation, '.'.join(version.split('.')[:2]), platform])
+
+
+def _read_header(lockfile : Path) -> dict:
+    """Reads the '# Key: value' header written by lock at the top of a lockfile."""
+    header = {}
+    with open(lockfile, 'r') as fd:
+        for line in fd:
+            if not line.startswith('#'):
+                break
+            key, _, value = line[1:].partition(':')
+            header[key.strip()] = value.strip()
+    return header
+
+
+def _cache_key(specs : List[str], interpreter : str, options : str) -> str:
+    # format changes with the lockfile layout, resolutions cached by an earlier release aren't reused.
+    key = json.dumps({'format': 2, 'specs': sorted(set(specs)), 'interpreter': interpreter, 'options': options}, sort_keys=True)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def _markers(report : dict) -> str:
+    """Environment markers of the interpreter a pip installation report was resolved with."""
+    return ' and '.join(f'{x} == "{report["environment"][x]}"' for x in _MARKERS)
+
+
+def _render(report : dict) -> List[str]:
+    """Renders a pip installation report into pinned lockfile entries.
+
+    Args:
+        report: Installation report produced by pip install --report.
+
+    Returns:
+        Lockfile entries, one per package.
+
+    Raises:
+        ValueError: Raised when a package of the resolution doesn't carry a sha256 hash, such as local directories.
+    """
+    markers = _markers(report)
+    entries = []
+    for item in sorted(report['install'], key=lambda x: x['metadata']['name'].lower()):
+        name, version = item['metadata']['name'], item['metadata']['version']
+        download_info = item['download_info']
+        archive_info = download_info.get('archive_info', {})
+        digest = archive_info.get('hashes', {}).get('sha256')
+        if not digest and archive_info.get('hash', '').startswith('sha256='):
+            digest = archive_info['hash'][len('sha256='):]
+        if not digest:
+            raise ValueError(f'Unable to lock {name}, no sha256 hash available for {download_info["url"]}.')
+        requirement = f'{name} @ {download_info["url"]}' if item.get('is_direct') else f'{name}=={version}'
+        entries.append(f'{requirement} ; {markers} \\\n    --hash=sha256:{digest}')
+    return entries
+
+
+def lock(environment, specs : Iterable[Union[pip.Package, str]], lockfile : str = 'pybuild.lock', refresh : bool = False, **kwargs) -> Path:
+    """Resolves the specifications into a fully pinned lockfile.
+
+    Args:
+        environment: Environment where PyBuild exists, this was initialized during the Environment initialization stage.
+        specs: Packages or requirement specifications to resolve, example ['matplotlib>=1.0.0', 'numpy'].
+        lockfile: File name to store the lockfile in.
+        refresh: Ignore a cached resolution and resolve again, picking up newly released versions.
+        kwargs: Additional pip install options used while resolving, example index_url='https://foo'.
+
+    Returns:
+        Path to lockfile created.
+
+    Raises:
+        ValueError: Raised when process fails to execute properly or the resolution can't be hashed.
+    """
+    specs = [str(x).strip() for x in specs]
+    interpreter = _interpreter_tag(environment)
+    options = pip.options(**kwargs)
+    cached = Path(file_utils.cache_directory('lock'), _cache_key(specs, interpreter, options))
+
+    if cached.exists() and not refresh:
+        logging.info(f'Using cached resolution for {", ".join(specs)}.')
+    else:
+        with TemporaryDirectory() as tmpdir:
+            report = Path(tmpdir, 'report.json')
+            rc = pip.run(environment, 'install --dry-run --ignore-installed --quiet --report {} {} {}'.format(
+                process_utils.quote(str(report)), ' '.join(map(process_utils.quote, specs)), options))
+            if rc != 0 or not report.exists():
+                raise ValueError(f'Failed to resolve {", ".join(specs)}.')
+            with open(report, 'r') as fd:
+                report = json.load(fd)
+            entries = _render(report)
+        header = ['# Generated by pybuild.lock, install with pybuild.lock.install_locked.',
+                  f'# Interpreter: {interpreter}',
+                  f'# Markers: {_markers(report)}',
+                  f'# Specifications: {" ".join(sorted(set(specs)))}']
+        # Write then rename, a concurrent lock of the same specifications never sees a partial file.
+        partial = Path(f'{cached}.{os.getpid()}.partial')
+        partial.write_text('\n'.join(header + entries) + '\n')
+        partial.replace(cached)
+
+    path = Path(Path.cwd(), lockfile)
+    shutil.copyfile(cached, path)
+    return path
+
+
+def install_locked(environment, lockfile : Union[str, Path], **kwargs) -> int:
+    """Installs a lockfile created by lock without resolving any dependencies.
+
+    Every package is installed exactly as pinned and checked against its hash, --no-deps --require-hashes. The lockfile
+    is only valid for the interpreter it was resolved with, pip would otherwise skip every package over its markers and
+    report success having installed nothing.
+
+    Args:
+        environment: Environment where PyBuild exists, this was initialized during the Environment initialization stage.
+        lockfile: Lockfile created by lock.
+        kwargs: Additional pip install options, see pip.install.
+
+    Returns:
+        Return code of process launched.
+
+    Raises:
+        FileNotFoundError: Raised when the lockfile cannot be found.
+        ValueError: Raised when process fails to execute properly or the lockfile was resolved for another interpreter.
+    """
+    lockfile = Path(lockfile)
+    if not lockfile.exists():
+        raise FileNotFoundError(f'Failed to find lockfile {lockfile}.')
+    locked = _read_header(lockfile).get('Interpreter')
+    if not locked:
+        raise ValueError(f'Lockfile {lockfile} wasn\'t created by pybuild.lock, interpreter unknown.')
+    interpreter = _interpreter_tag(environment)
+    if _compatible(locked) != _compatible(interpreter):
+        raise ValueError(f'Lockfile {lockfile} was resolved for {locked}, environment {environment.name()} runs {interpreter}.')
+    return pip.install(environment, requirement=process_utils.quote(str(lockfile)), no_deps=True, require_hashes=True, **kwargs)
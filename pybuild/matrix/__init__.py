@@ -0,0 +1,194 @@
+"""Runs a build script across a matrix of Python interpreters and dependency variants.
+
+    Every cell of the matrix, one interpreter paired with one requirement variant, receives its own virtual environment
+    created from that interpreter. The variant is installed into it and the target, a callable receiving the Environment or
+    a command run with the environments interpreter, is run inside. Cells run in parallel up to the concurrency cap.
+
+    Nothing is fetched by the cells themselves. Before any cell starts every variant is downloaded once per interpreter into
+    a wheelhouse shared by the whole matrix, cells then install from it with --no-index --find-links. Interpreters which are
+    the same file and variants which are equal share a single download. Downloads go through the users own pip cache,
+    already warm from earlier installations, cache_dir may be passed to use another directory instead. A variant which
+    fails to download is installed from the index by its cells as usual.
+
+    Basic Usage:
+
+    ```
+    from pybuild import matrix
+
+    cells = matrix.run(['python3.8', 'python3.11'], [['numpy<2'], ['numpy>=2']], '-m pytest', concurrency=2)
+    for cell in cells:
+        print(cell.interpreter, cell.requirements, cell.succeeded(), cell.duration())
+    ```
+
+    A variant may also be the Path to a lockfile created by pybuild.lock, which is then installed without resolving.
+
+"""
+import logging
+import os
+import shutil
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Callable, Dict, Iterable, List, Tuple, Union
+
+from pybuild import lock, pip
+from pybuild.environment import Environment
+from pybuild.utils import process_utils
+
+# pip install options which also decide what pip download fetches, anything else only applies to the installation.
+_FETCH_OPTIONS = {'cache_dir', 'constraint', 'extra_index_url', 'find_links', 'index_url', 'no_binary', 'only_binary', 'pre',
+                  'prefer_binary', 'trusted_host'}
+
+
+class Cell:
+    """Single interpreter and requirement variant pairing of the matrix along with its outcome."""
+
+    def __init__(self, name : str, interpreter : Path, requirements : Union[List[str], Path]):
+        """Initialization function of the class.
+
+        Args:
+            name: Name of the environment created for the cell.
+            interpreter: Interpreter the environment is created from.
+            requirements: Requirement specifications or lockfile installed into the environment.
+        """
+        self.name = name
+        self.interpreter = interpreter
+        self.requirements = requirements
+        self.result = None # type: Any
+        self.error = None # type: Exception
+        self.timings = {} # type: Dict[str, float]
+
+
+    def __repr__(self):
+        return f'Cell({self.name}, {self.interpreter}, {self.requirements})'
+
+
+    def duration(self) -> float:
+        """Returns the total seconds spent on the cell."""
+        return sum(self.timings.values())
+
+
+    def succeeded(self) -> bool:
+        """Returns True if the cell was set up and its target ran without raising."""
+        return self.error is None
+
+
+def _find_interpreter(interpreter : Union[str, Path]) -> Path:
+    """Resolves an interpreter given by path or by name on PATH, example 'python3.11'.
+
+    Raises:
+        FileNotFoundError: Raised when the interpreter cannot be found.
+    """
+    if Path(interpreter).is_file():
+        return Path(interpreter).absolute()
+    found = shutil.which(str(interpreter))
+    if not found:
+        raise FileNotFoundError(f'Failed to find interpreter {interpreter}.')
+    return Path(found)
+
+
+def _variant_key(interpreter : Path, requirements : Union[List[str], Path]) -> Tuple[str, Any]:
+    """Identifies what a cell fetches, the same interpreter file with equal requirements fetches the same artifacts."""
+    return os.path.realpath(interpreter), str(requirements) if isinstance(requirements, Path) else tuple(sorted(requirements))
+
+
+def _fetch(interpreter : Path, requirements : Union[List[str], Path], wheelhouse : Path, **kwargs) -> bool:
+    """Downloads everything a variant installs into the wheelhouse, resolved for the interpreter it is installed with.
+
+    Returns:
+        True if the variant can be installed from the wheelhouse alone.
+    """
+    environment = Environment('pybuild_matrix_fetch', interpreter=interpreter)
+    kwargs = {k: v for k, v in kwargs.items() if k in _FETCH_OPTIONS}
+    try:
+        if isinstance(requirements, Path):
+            pip.download(environment, destination=wheelhouse, requirement=process_utils.quote(str(requirements)),
+                         no_deps=True, require_hashes=True, **kwargs)
+        else:
+            pip.download(environment, *map(process_utils.quote, requirements), destination=wheelhouse, **kwargs)
+    except ValueError as error:
+        logging.warning(f'Unable to fetch {requirements} for {interpreter}, its cells install from the index, {error}')
+        return False
+    return True
+
+
+def _run_cell(cell : Cell, target : Union[Callable[[Environment], Any], str], keep : bool, **kwargs) -> Cell:
+    environment = Environment(cell.name, interpreter=cell.interpreter)
+    try:
+        start = time.perf_counter()
+        # venv ships with every interpreter, unlike virtualenv it doesn't have to be installed into the interpreter first.
+        if process_utils.create_process(str(cell.interpreter), f'-m venv {cell.name}') != 0:
+            raise OSError(f'Failed to create virtual environment {cell.name}.')
+        environment._find_interpreter()
+        if isinstance(cell.requirements, Path):
+            lock.install_locked(environment, cell.requirements, **kwargs)
+        elif cell.requirements:
+            pip.install(environment, *map(process_utils.quote, cell.requirements), **kwargs)
+        cell.timings['setup'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        try:
+            if callable(target):
+                cell.result = target(environment)
+            else:
+                cell.result = process_utils.create_process(str(environment.python()), target)
+                if cell.result != 0:
+                    raise ValueError(f'Failed to run {target} in {cell.name}.')
+        finally:
+            cell.timings['run'] = time.perf_counter() - start
+    except Exception as error:
+        logging.error(f'Matrix cell {cell.name} failed, {error}')
+        cell.error = error
+    finally:
+        if not keep:
+            environment.cleanup()
+    return cell
+
+
+def run(interpreters : Iterable[Union[str, Path]], variants : Iterable[Union[Iterable[Union[pip.Package, str]], Path]],
+        target : Union[Callable[[Environment], Any], str], concurrency : int = None, name : str = 'pybuild_matrix',
+        keep : bool = False, wheelhouse : Union[str, Path] = None, **kwargs) -> List[Cell]:
+    """Runs the target in one environment per interpreter and requirement variant pairing.
+
+    Args:
+        interpreters: Interpreters given by path or by name on PATH, example ['python3.8', '/opt/python/bin/python3.11'].
+        variants: Requirement specifications to install per cell, example [['numpy<2'], ['numpy>=2']], or lockfile Paths.
+        target: Callable receiving the cells Environment, or arguments run with the cells interpreter, example '-m pytest'.
+        concurrency: Maximum number of cells running at once, default is the number of processors.
+        name: Prefix of the environment names, cells are named {name}_{interpreter index}_{variant index}.
+        keep: Keep the environments once the cells complete, by default each environment is removed with its cell.
+        wheelhouse: Directory variants are downloaded into and reused from across runs, default is a temporary directory.
+        kwargs: Additional pip install options, see pip.install. Index options such as index_url also apply to the downloads.
+
+    Returns:
+        Cells in interpreter then variant order, holding the result, error and timings of each.
+
+    Raises:
+        FileNotFoundError: Raised when an interpreter cannot be found.
+    """
+    interpreters = [_find_interpreter(x) for x in interpreters]
+    variants = [x if isinstance(x, Path) else [str(y) for y in x] for x in variants]
+    if kwargs.get('cache_dir'):
+        kwargs['cache_dir'] = process_utils.quote(str(kwargs['cache_dir']))
+
+    cells = [Cell(f'{name}_{i}_{j}', interpreter, variant)
+             for i, interpreter in enumerate(interpreters) for j, variant in enumerate(variants)]
+    with TemporaryDirectory() as tmpdir:
+        wheelhouse = Path(wheelhouse if wheelhouse else tmpdir).absolute()
+        wheelhouse.mkdir(parents=True, exist_ok=True)
+        # Fetched one after another, concurrent downloads of a shared dependency would write the same wheelhouse file.
+        fetched = {}
+        for cell in cells:
+            key = _variant_key(cell.interpreter, cell.requirements)
+            if cell.requirements and key not in fetched:
+                fetched[key] = _fetch(cell.interpreter, cell.requirements, wheelhouse, **kwargs)
+        offline = dict(kwargs, find_links=process_utils.quote(str(wheelhouse)), no_index=True)
+        options = [offline if fetched.get(_variant_key(x.interpreter, x.requirements)) else kwargs for x in cells]
+
+        with ThreadPoolExecutor(max_workers=concurrency if concurrency else os.cpu_count()) as executor:
+            cells = list(executor.map(lambda x: _run_cell(x[0], target, keep, **x[1]), zip(cells, options)))
+
+    logging.info(f'Matrix completed, {sum(x.succeeded() for x in cells)}/{len(cells)} cells succeeded.')
+    return cells
@@ -14,13 +14,18 @@
     
     The above will install the pandas package and the developer has requred to not install with user flag enabled.
 
+    When a PyBuild daemon is running (see pybuild.daemon) the operations are run inside of a warm worker interpreter
+    instead of starting a new interpreter for every call, otherwise a process is created as usual.
+
 """
 import logging
+import shlex
 
 from pathlib import Path
 from typing import List, Union
 
 # from pybuild.environment import Environment
+from pybuild import daemon
 from pybuild.utils import process_utils
 
 
@@ -47,6 +52,77 @@ class Package:
         return base_package
 
 
+def run(environment, arguments : str, output : str = None) -> int:
+    """Runs pip against the environment, through the daemon when one is available else through a new process.
+
+    Modules building their own pip commands should run them through here rather than creating processes themselves.
+
+    Args:
+        environment: Environment where PyBuild exists, this was initialized during the Environment initialization stage.
+        arguments: Arguments passed to pip, example 'install numpy'. Quote paths with process_utils.quote.
+        output: File name stdout of pip is redirected to.
+
+    Returns:
+        Return code of pip.
+    """
+    response = daemon.request(environment.python(), shlex.split(arguments))
+    if response is None:
+        return process_utils.create_process(str(environment.python()), f'-m pip {arguments}' + (f' > {output}' if output else ''))
+
+    rc, stdout, stderr = response
+    if output:
+        with open(output, 'w') as fd:
+            fd.write(stdout)
+    else:
+        [logging.info(x) for x in stdout.splitlines()]
+    [logging.error(x) for x in stderr.splitlines()]
+    return rc
+
+
+def options(**kwargs) -> str:
+    """Converts keyword arguments into pip command line options.
+
+    Underscores are replaced by dashes, True enables the flag, False omits it and any other value is passed along.
+    Example: options(no_cache_dir=True, index_url='https://foo') results in '--no-cache-dir --index-url https://foo'.
+
+    Returns:
+        Options string that can be appended to a pip command.
+    """
+    command_string = []
+    for k, v in kwargs.items():
+        processed_k = k.replace('_', '-')
+        if str(v) == 'True':
+            command_string.append('--{}'.format(processed_k))
+        elif str(v) != 'False':
+            command_string.append('--{} {}'.format(processed_k, v))
+    return ' '.join(command_string)
+
+
+def download(environment, *packages : Union[Package, str], destination : Union[str, Path], **kwargs) -> int:
+    """Downloads packages and their dependencies without installing them.
+
+    Everything is fetched for the interpreter of the environment, later installations may pass the destination through
+    find_links and no_index rather than fetching again.
+
+    Args:
+        environment: Environment where PyBuild exists, this was initialized during the Environment initialization stage.
+        packages: Packages to be downloaded.
+        destination: Directory the downloaded files are stored in.
+        kwargs: Additional pip download options, example index_url='https://foo'.
+
+    Returns:
+        Return code of process launched.
+
+    Raises:
+        ValueError: Raised when process fails to execute properly.
+    """
+    rc = run(environment, 'download --dest {} {} {}'.format(process_utils.quote(str(destination)),
+                                                            ' '.join(map(str, packages)), options(**kwargs)))
+    if rc != 0:
+        raise ValueError('Failed to download.')
+    return rc
+
+
 def freeze(environment, file_name : str) -> Path:
     """Freezes the pip dependencies of the current environment into a text file.
 
@@ -61,7 +137,7 @@ def freeze(environment, file_name : str) -> Path:
         ValueError: Raised when process fails to execute properly.
         FileNotFoundError: Raised when pip freeze successfully runs but the file_name cannot be found.
     """
-    rc = process_utils.create_process(str(environment.python()), f'-m pip freeze > {file_name}')
+    rc = run(environment, 'freeze', output=file_name)
     if rc != 0:
         raise ValueError('Failed to freeze pip environment.')
     path = Path(Path.cwd(), file_name)
@@ -87,15 +163,7 @@ def install(environment, *packages : Union[Package, str], **kwargs) -> Union[Pat
         ValueError: Raised when process fails to execute properly.
     """
     # TODO: Process user input
-    command_string = []
-    for k, v in kwargs.items():
-        processed_k = k.replace('_', '-')
-        if str(v) == 'True':
-            command_string.append('--{}'.format(processed_k))
-        elif str(v) != 'False':
-            command_string.append('--{} {}'.format(processed_k, v))
-
-    rc = process_utils.create_process(str(environment.python()), '-m pip install {} {}'.format(' '.join(map(str, packages)) if packages else '', ' '.join(command_string)))
+    rc = run(environment, 'install {} {}'.format(' '.join(map(str, packages)) if packages else '', options(**kwargs)))
     if rc != 0:
         raise ValueError('Failed to install.')
     logging.info(f'Successfully installed {", ".join(map(str, packages))}.')
@@ -117,7 +185,7 @@ def list(environment):# -> List[str]:
     Raises:
         ValueError: Raised when process fails to execute properly.
     """
-    rc = process_utils.create_process(str(environment.python()), '-m pip list')
+    rc = run(environment, 'list')
     if rc != 0:
         raise ValueError('Failed to uninstall.')
 
@@ -137,15 +205,7 @@ def uninstall(environment, *packages : Union[Package, str], **kwargs) -> bool:
     Raises:
         ValueError: Raised when process fails to execute properly.
     """
-    command_string = []
-    for k, v in kwargs.items():
-        processed_k = k.replace('_', '-')
-        if str(v) == 'True':
-            command_string.append('--{}'.format(processed_k))
-        else:
-            command_string.append('--{} {}'.format(processed_k, v))
-
-    rc = process_utils.create_process(str(environment.python()), '-m pip uninstall -y {} {}'.format(' '.join(map(str, packages)) if packages else '', ' '.join(command_string)))
+    rc = run(environment, 'uninstall -y {} {}'.format(' '.join(map(str, packages)) if packages else '', options(**kwargs)))
     if rc != 0:
         raise ValueError('Failed to uninstall.')
     logging.info(f'Successfully uninstalled {", ".join(map(str, packages))}.')
@@ -167,7 +227,7 @@ def upgrade(environment, *packages : Package) -> bool:
     Raises:
         ValueError: Raised when process fails to execute properly.
     """
-    rc = process_utils.create_process(str(environment.python()), '-m pip -U {}'.format(' '.join(map(str, packages)) if packages else ''))
+    rc = run(environment, '-U {}'.format(' '.join(map(str, packages)) if packages else ''))
     if rc != 0:
         raise ValueError('Failed to upgrade.')
     logging.info(f'Successfully upgraded {", ".join(map(str, packages))}.')
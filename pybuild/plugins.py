@@ -0,0 +1,141 @@
+"""Registry of external PyBuild modules.
+
+    Distributions may register their own modules with PyBuild through the pybuild.modules entry point group, the entry
+    point name becomes the attribute the module is reachable through.
+
+    ```
+    setup(
+        ...
+        entry_points={
+            'pybuild.modules': ['docker = pybuild_docker']
+        }
+    )
+    ```
+
+    ```
+    import pybuild
+
+    pybuild.docker.build(environment, ...)
+    ```
+
+    Registered modules are only imported on first access. Discovery reads entry_points.txt of every installed distribution,
+    the result is cached inside the PyBuild cache (see file_utils.cache_directory) and is only discovered again once the
+    set of installed distributions changes.
+
+"""
+import hashlib
+import importlib
+import json
+import logging
+import os
+import sys
+
+from pathlib import Path
+from types import ModuleType
+from typing import Dict
+
+from pybuild.utils import file_utils
+
+GROUP = 'pybuild.modules'
+
+_registry = None # type: Dict[str, str]
+
+
+def _distribution_directories():
+    """Yields the metadata directories of every distribution visible through sys.path."""
+    for entry in sys.path:
+        try:
+            names = sorted(os.listdir(entry or '.'))
+        except OSError:
+            continue
+        for name in names:
+            if name.endswith(('.dist-info', '.egg-info')):
+                yield Path(entry or '.', name)
+
+
+def _fingerprint() -> str:
+    """Identifies the installed distribution set, listing the site directories is all that is required."""
+    return hashlib.sha256('\n'.join(str(x) for x in _distribution_directories()).encode('utf-8')).hexdigest()
+
+
+def _read_entry_points(path : Path) -> Dict[str, str]:
+    """Reads the pybuild.modules section out of an entry_points.txt file."""
+    entry_points, section = {}, None
+    for line in path.read_text(encoding='utf-8', errors='replace').splitlines():
+        line = line.strip()
+        if not line or line.startswith(('#', ';')):
+            continue
+        if line.startswith('[') and line.endswith(']'):
+            section = line[1:-1].strip()
+        elif section == GROUP and '=' in line:
+            name, _, value = line.partition('=')
+            entry_points[name.strip()] = value.split('[', 1)[0].strip()
+    return entry_points
+
+
+def discover(refresh : bool = False) -> Dict[str, str]:
+    """Discovers the registered external modules.
+
+    Args:
+        refresh: Ignore the cached discovery and read every distribution again.
+
+    Returns:
+        Entry point values keyed by module name, example {'docker': 'pybuild_docker'}.
+    """
+    global _registry
+    if _registry is not None and not refresh:
+        return _registry
+
+    fingerprint = _fingerprint()
+    # Every environment has its own distribution set, environments sharing the cache never invalidate each other.
+    prefix = hashlib.sha256(sys.prefix.encode('utf-8')).hexdigest()[:16]
+    try:
+        cache = Path(file_utils.cache_directory('plugins'), f'{sys.implementation.cache_tag}-{prefix}.json')
+        if cache.exists() and not refresh:
+            cached = json.loads(cache.read_text())
+            if cached['fingerprint'] == fingerprint:
+                _registry = cached['modules']
+                return _registry
+    except (OSError, ValueError, KeyError) as error:
+        # An unusable cache only costs the discovery below, attribute lookups on pybuild must never fail over it.
+        logging.debug(f'Unable to read cached PyBuild modules, {error}.')
+        cache = None
+
+    modules = {}
+    for directory in _distribution_directories():
+        entry_points = Path(directory, 'entry_points.txt')
+        if entry_points.is_file():
+            for name, value in _read_entry_points(entry_points).items():
+                modules.setdefault(name, value)
+    try:
+        if cache:
+            # Write then rename, a concurrent discovery never reads a partial file.
+            partial = Path(f'{cache}.{os.getpid()}.partial')
+            partial.write_text(json.dumps({'fingerprint': fingerprint, 'modules': modules}))
+            partial.replace(cache)
+    except OSError as error:
+        logging.debug(f'Unable to cache PyBuild modules, {error}.')
+    _registry = modules
+    return _registry
+
+
+def load(name : str) -> ModuleType:
+    """Imports a registered external module.
+
+    Args:
+        name: Name the module was registered with.
+
+    Returns:
+        Imported module, or the object referred to when the entry point names one (module:attribute).
+
+    Raises:
+        AttributeError: Raised when no module was registered with the name.
+    """
+    modules = discover()
+    if name not in modules:
+        raise AttributeError(f'module \'pybuild\' has no attribute \'{name}\'')
+    module_name, _, attribute = modules[name].partition(':')
+    module = importlib.import_module(module_name.strip())
+    for part in filter(None, attribute.strip().split('.')):
+        module = getattr(module, part)
+    return module
@@ -0,0 +1,231 @@
+"""Installed distribution utilities for PyBuild.
+
+    Reads the distributions installed into site-packages directly from their dist-info (or egg-info) metadata instead of
+    asking pip, nothing is imported and no interpreter is started. RECORD files of dist-info directories may optionally be
+    verified, catching files which were tampered with or partially installed.
+
+"""
+import base64
+import csv
+import hashlib
+import re
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class Distribution:
+    """Distribution installed into a site-packages directory."""
+
+    def __init__(self, name : str, version : Optional[str], path : Path = None):
+        """Initialization function of the class.
+
+        Args:
+            name: Distribution name.
+            version: Installed version, None when unknown such as unpinned requirements.
+            path: Location of the dist-info or egg-info metadata, None when not read from disk.
+        """
+        self.name = name
+        self.version = version
+        self.path = path
+        self.corrupted = [] # type: List[str]
+
+
+    def __repr__(self):
+        return f'Distribution({self.name}=={self.version})'
+
+
+class EnvironmentDiff:
+    """Structured difference between an environment and another environment or requirements file."""
+
+    def __init__(self):
+        self.added = {} # type: Dict[str, str]
+        self.removed = {} # type: Dict[str, str]
+        self.changed = {} # type: Dict[str, Tuple[str, str]]
+        self.corrupted = {} # type: Dict[str, List[str]]
+
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed or self.corrupted)
+
+
+    def __str__(self):
+        lines = [f'+ {k}=={v}' for k, v in sorted(self.added.items())]
+        lines += [f'- {k}=={v}' for k, v in sorted(self.removed.items())]
+        lines += [f'~ {k} {v[1]} -> {v[0]}' for k, v in sorted(self.changed.items())]
+        lines += [f'! {k} {", ".join(v)}' for k, v in sorted(self.corrupted.items())]
+        return '\n'.join(lines)
+
+
+def canonicalize_name(name : str) -> str:
+    """Normalizes a distribution name as described by PEP 503, Foo.Bar and foo_bar are the same distribution."""
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+# PEP 440 version pattern, see https://peps.python.org/pep-0440/#appendix-b-parsing-version-strings-with-regular-expressions
+_VERSION_PATTERN = re.compile(r"""
+    ^\s*v?
+    (?:(?P<epoch>[0-9]+)!)?
+    (?P<release>[0-9]+(?:\.[0-9]+)*)
+    (?:[-_.]?(?P<pre_l>alpha|a|beta|b|preview|pre|c|rc)[-_.]?(?P<pre_n>[0-9]+)?)?
+    (?:-(?P<post_n1>[0-9]+)|[-_.]?(?P<post_l>post|rev|r)[-_.]?(?P<post_n2>[0-9]+)?)?
+    (?:[-_.]?(?P<dev_l>dev)[-_.]?(?P<dev_n>[0-9]+)?)?
+    (?:\+(?P<local>[a-z0-9]+(?:[-_.][a-z0-9]+)*))?
+    \s*$
+""", re.VERBOSE | re.IGNORECASE)
+
+_PRE_RELEASES = {'alpha': 'a', 'a': 'a', 'beta': 'b', 'b': 'b', 'preview': 'rc', 'pre': 'rc', 'c': 'rc', 'rc': 'rc'}
+
+
+def normalize_version(version : str) -> str:
+    """Normalizes a version as described by PEP 440, 1.0 and 1.0.0 or 1.0RC1 and 1.0rc1 are the same version.
+
+    Returns:
+        Normalized version, versions which aren't valid PEP 440 are only stripped and lowercased.
+    """
+    match = _VERSION_PATTERN.match(version)
+    if not match:
+        return version.strip().lower()
+    release = [int(x) for x in match.group('release').split('.')]
+    while len(release) > 1 and release[-1] == 0:
+        release.pop()
+    normalized = f'{int(match.group("epoch"))}!' if match.group('epoch') and int(match.group('epoch')) else ''
+    normalized += '.'.join(map(str, release))
+    if match.group('pre_l'):
+        normalized += f'{_PRE_RELEASES[match.group("pre_l").lower()]}{int(match.group("pre_n") or 0)}'
+    if match.group('post_n1') or match.group('post_l'):
+        normalized += f'.post{int(match.group("post_n1") or match.group("post_n2") or 0)}'
+    if match.group('dev_l'):
+        normalized += f'.dev{int(match.group("dev_n") or 0)}'
+    if match.group('local'):
+        normalized += '+' + re.sub(r'[-_.]', '.', match.group('local').lower())
+    return normalized
+
+
+def _read_metadata(path : Path) -> Tuple[Optional[str], Optional[str]]:
+    """Reads Name and Version from the headers of a METADATA or PKG-INFO file, the body is never read."""
+    name = version = None
+    with open(path, 'r', encoding='utf-8', errors='replace') as fd:
+        for line in fd:
+            if not line.strip():
+                break
+            if line.startswith('Name:'):
+                name = line[len('Name:'):].strip()
+            elif line.startswith('Version:'):
+                version = line[len('Version:'):].strip()
+    return name, version
+
+
+def _verify_record(site_packages : Path, record : Path) -> List[str]:
+    """Verifies every hashed entry inside a RECORD file.
+
+    Returns:
+        Files listed in RECORD which are missing or whose hash doesn't match.
+    """
+    corrupted = []
+    with open(record, 'r', encoding='utf-8', newline='') as fd:
+        for row in csv.reader(fd):
+            if len(row) < 2 or not row[1]:
+                continue
+            file_name, (algorithm, _, expected) = row[0], row[1].partition('=')
+            path = Path(site_packages, file_name)
+            try:
+                digest = hashlib.new(algorithm, path.read_bytes()).digest()
+            except (OSError, ValueError):
+                corrupted.append(file_name)
+                continue
+            if base64.urlsafe_b64encode(digest).rstrip(b'=').decode('ascii') != expected:
+                corrupted.append(file_name)
+    return corrupted
+
+
+def _read_distribution(site_packages : Path, path : Path, verify : bool) -> Optional[Distribution]:
+    metadata = Path(path, 'METADATA') if path.suffix == '.dist-info' else Path(path, 'PKG-INFO') if path.is_dir() else path
+    if not metadata.is_file():
+        return None
+    name, version = _read_metadata(metadata)
+    if not name:
+        return None
+    distribution = Distribution(name, version, path)
+    record = Path(path, 'RECORD')
+    if verify and record.is_file():
+        distribution.corrupted = _verify_record(site_packages, record)
+    return distribution
+
+
+def scan(site_packages : Iterable[Path], verify : bool = False, workers : int = None) -> Dict[str, Distribution]:
+    """Scans site-packages directories for installed distributions, reading their metadata in parallel.
+
+    Args:
+        site_packages: Directories to scan, in the order the interpreter searches them.
+        verify: Verify the hashes inside of RECORD files, reported through Distribution.corrupted.
+        workers: Maximum number of threads reading metadata, default is decided by ThreadPoolExecutor.
+
+    Returns:
+        Installed distributions keyed by canonical name, the first directory a distribution is found in wins.
+    """
+    candidates = []
+    for directory in site_packages:
+        directory = Path(directory)
+        if directory.is_dir():
+            candidates.extend((directory, x) for x in directory.iterdir() if x.suffix in ('.dist-info', '.egg-info'))
+
+    distributions = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for distribution in executor.map(lambda x: _read_distribution(*x, verify), candidates):
+            if distribution:
+                distributions.setdefault(canonicalize_name(distribution.name), distribution)
+    return distributions
+
+
+def read_requirements(requirements : Path) -> Dict[str, Distribution]:
+    """Reads the distributions listed in a requirements file, pip freeze output or pybuild.lock lockfile.
+
+    Options, hashes, comments and environment markers are ignored. Only pinned (==) requirements carry a version.
+
+    Returns:
+        Listed distributions keyed by canonical name.
+
+    Raises:
+        FileNotFoundError: When requirements wasn't able to be found.
+    """
+    if not requirements.exists():
+        raise FileNotFoundError(f'Unable to find requirements, path provided {str(requirements)}.')
+    distributions = {}
+    content = requirements.read_text().replace('\\\n', ' ')
+    for line in content.splitlines():
+        line = line.split('#', 1)[0].split(';', 1)[0].split(' --', 1)[0].strip()
+        if not line or line.startswith('-'):
+            continue
+        match = re.match(r'^([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*(?:==\s*([^\s,]+)\s*$)?', line)
+        if match:
+            distributions[canonicalize_name(match.group(1))] = Distribution(match.group(1), match.group(2))
+    return distributions
+
+
+def diff(ours : Dict[str, Distribution], theirs : Dict[str, Distribution]) -> EnvironmentDiff:
+    """Compares two sets of distributions, see scan and read_requirements.
+
+    Args:
+        ours: Distributions of the environment being checked.
+        theirs: Distributions the environment is compared against.
+
+    Returns:
+        EnvironmentDiff where added are only in ours, removed are only in theirs and changed maps to (ours, theirs) versions.
+        Versions are only compared when both sides know them and are compared once normalized, see normalize_version.
+        Corrupted lists the files of ours failing verification.
+    """
+    result = EnvironmentDiff()
+    for key, distribution in ours.items():
+        if key not in theirs:
+            result.added[distribution.name] = distribution.version
+        elif distribution.version and theirs[key].version and \
+                normalize_version(distribution.version) != normalize_version(theirs[key].version):
+            result.changed[distribution.name] = (distribution.version, theirs[key].version)
+        if distribution.corrupted:
+            result.corrupted[distribution.name] = distribution.corrupted
+    for key, distribution in theirs.items():
+        if key not in ours:
+            result.removed[distribution.name] = distribution.version
+    return result
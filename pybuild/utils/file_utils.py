@@ -3,6 +3,7 @@
     This class provides a general interface for various file related operations that a user may experience while using PyBuild.
 
 """
+import os
 import re
 import shutil
 
@@ -12,6 +13,25 @@ from tempfile import NamedTemporaryFile
 from pybuild.utils import os_utils
 
 
+def cache_directory(*target : str) -> Path:
+    """Retrieves a directory inside the PyBuild cache, creating it if needed.
+
+    The cache defaults to ~/.cache/pybuild and may be changed through the PYBUILD_CACHE_DIR environment variable.
+
+    Args:
+        target: Single or multiple strings provided that extend from the cache directory.
+
+    Returns:
+        Path to the cache directory.
+    """
+    if any(['..' in x for x in target]):
+        raise ValueError('Backing out from directories not supported.')
+    base = Path(os.environ['PYBUILD_CACHE_DIR']) if 'PYBUILD_CACHE_DIR' in os.environ else Path(Path.home(), '.cache', 'pybuild')
+    path = Path(base, *target)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
 def copy(src, dst, *args):
     """Copy files and directories in PyBuild.
     
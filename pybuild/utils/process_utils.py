@@ -7,6 +7,8 @@ import subprocess
 from pathlib import Path
 from threading import Thread
 
+from pybuild.utils import os_utils
+
 
 class _AsyncLoggingThread(Thread):
     """Async Logging Thread class"""
@@ -72,4 +74,20 @@ def create_process(executable : str, command : str, wait : bool = True) -> subpr
         process.wait()
         [x.join() for x in async_threads]
         return process.poll()
-    return process
\ No newline at end of file
+    return process
+
+
+def quote(argument : str) -> str:
+    """Quotes an argument for the shell create_process runs commands through.
+
+    POSIX shells and cmd.exe quote differently, single quotes are kept as literal characters by cmd.exe.
+
+    Args:
+        argument: Argument to quote, such as a path containing spaces.
+
+    Returns:
+        Argument safe to join into the command passed to create_process.
+    """
+    if os_utils.get_os() == os_utils.SupportedOS.WINDOWS:
+        return subprocess.list2cmdline([argument])
+    return shlex.quote(argument)
@@ -4,7 +4,7 @@
     regarded as the systems interpreter. In the event of this, VirtualEnv was stood up to allow the user freedom of creating a virtual environment
     whenever and allowing themselves to install dependencies using pip prior to the virtual environments creation.
 
-    Environment has a hard set limitation based on _find_interpreter that only runs once, after the sys.executable and __interpreter differ
+    Environment has a hard set limitation based on _find_interpreter that only runs once, after the interpreter the environment started from and __interpreter differ
     the function won't operate again. To avoid this, create multiple environments where you need additional virtual environments.
 
     Basic Usage:
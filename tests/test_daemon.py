@@ -0,0 +1,128 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from pathlib import Path
+
+from pybuild import daemon
+from pybuild import pip
+from pybuild.daemon import server
+from pybuild.environment import Environment
+
+@unittest.skipUnless(hasattr(server.socketserver, 'UnixStreamServer'), 'Unix sockets required by the daemon.')
+class TestDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self._socket = Path(self._tmpdir.name, 'pybuild.sock')
+        os.environ['PYBUILD_DAEMON_SOCKET'] = str(self._socket)
+        self._server = server.Daemon()
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+
+    def tearDown(self):
+        self._server.shutdown()
+        self._server.server_close()
+        del os.environ['PYBUILD_DAEMON_SOCKET']
+        self._tmpdir.cleanup()
+
+
+    def test_request(self):
+        assert daemon.available(), 'Daemon isn\'t listening.'
+        rc, stdout, _ = daemon.request(Environment('test_daemon_env').python(), ['show', 'pip'])
+        assert rc == 0, 'Daemon failed to run pip show.'
+        assert 'Name: pip' in stdout, 'Unexpected pip show output.'
+
+
+    def test_freeze(self):
+        requirements = Path(self._tmpdir.name, 'requirements.txt')
+        pip.freeze(Environment('test_daemon_env'), str(requirements))
+        expected = subprocess.check_output([sys.executable, '-m', 'pip', 'freeze'], universal_newlines=True)
+        assert requirements.read_text() == expected, 'Freeze through the daemon differs from pip freeze.'
+
+
+    def test_environment(self):
+        os.environ['PIP_INDEX_URL'] = 'https://pybuild.invalid/simple'
+        try:
+            rc, stdout, _ = daemon.request(Environment('test_daemon_env').python(), ['config', 'list'])
+        finally:
+            del os.environ['PIP_INDEX_URL']
+        assert rc == 0 and 'pybuild.invalid' in stdout, 'Environment variables of the client weren\'t forwarded.'
+
+
+    def test_exit_code(self):
+        python = Environment('test_daemon_env').python()
+        for args in [['--version'], ['help'], ['show', 'not-installed-foo']]:
+            rc, _, _ = daemon.request(python, args)
+            assert rc == subprocess.call([str(python), '-m', 'pip'] + args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL), \
+                f'Return code of pip {" ".join(args)} differs from a process.'
+
+
+    def test_failing_worker(self):
+        python = str(Path(Environment('test_daemon_env').python()).absolute())
+        daemon.request(python, ['--version'])
+        pool = self._server._pools[python]
+        worker = pool._idle[0]
+        worker.run = lambda *args: {'error': 'Broken worker.'}
+        assert daemon.request(python, ['--version']) is None, 'Worker error not reported.'
+        assert worker not in pool._workers, 'Failing worker returned to the pool.'
+        assert daemon.request(python, ['--version'])[0] == 0, 'Failing worker not replaced.'
+
+
+    def test_recreated_environment(self):
+        environment = Path(self._tmpdir.name, 'venv')
+        python = str(Path(environment, 'bin', 'python'))
+        for _ in range(2):
+            subprocess.check_call([sys.executable, '-m', 'venv', '--without-pip', '--system-site-packages', str(environment)])
+            assert daemon.request(python, ['--version'])[0] == 0, 'Failed to run pip inside the environment.'
+            pool = self._server._pools[python]
+            shutil.rmtree(environment)
+        assert daemon.request(python, ['--version']) is None, 'Removed environment still served.'
+        assert python not in self._server._pools, 'Pool of the removed environment kept.'
+        time.sleep(0.5)
+        assert pool.closed and not pool._workers, 'Workers of the removed environment not stopped.'
+
+
+    def test_idle(self):
+        python = str(Path(Environment('test_daemon_env').python()).absolute())
+        self._server._idle_timeout = 0.1
+        daemon.request(python, ['--version'])
+        pool = self._server._pools[python]
+        time.sleep(2)
+        assert python not in self._server._pools and pool.closed, 'Idle workers not stopped.'
+
+
+    def test_read_only(self):
+        assert daemon.read_only(['install', '--dry-run', '--report', '-', 'numpy']), 'Dry run install treated as modifying.'
+        assert not daemon.read_only(['install', 'numpy']), 'Install treated as read-only.'
+        assert not daemon.read_only(['config', 'set', 'global.index-url', 'https://foo']), 'pip config treated as read-only.'
+        assert not daemon.read_only([]), 'Empty arguments treated as read-only.'
+
+
+    def test_untrusted(self):
+        directory = Path(self._tmpdir.name, 'shared')
+        directory.mkdir(mode=0o777)
+        directory.chmod(0o777)
+        with self.assertRaises(OSError):
+            server.Daemon(Path(directory, 'pybuild.sock'))
+        self._socket.parent.chmod(0o755)
+        try:
+            assert not daemon.available(), 'Socket inside a directory accessible by others was trusted.'
+        finally:
+            self._socket.parent.chmod(0o700)
+
+
+    def test_fallback(self):
+        self._server.shutdown()
+        self._server.server_close()
+        assert not daemon.available(), 'Daemon still listening after shutdown.'
+        assert daemon.request(Environment('test_daemon_env').python(), ['list']) is None, 'Request without daemon should fall back.'
+
+
+if __name__ == '__main__':
+    unittest.main()
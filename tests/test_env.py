@@ -1,10 +1,14 @@
+import base64
+import hashlib
 import shutil
+import tempfile
 import unittest
 
 from pathlib import Path
 
 from pybuild import virtualenv
 from pybuild.environment import Environment
+from pybuild.utils import dist_utils
 
 class TestEnvironment(unittest.TestCase):
 
@@ -26,5 +30,54 @@ class TestEnvironment(unittest.TestCase):
         assert not test_env.exists(), 'Failed to delete virtual environment.'
 
 
+    def test_diff(self):
+        environment = Environment('test_diff_env')
+        assert not environment.diff(Environment('test_diff_other_env')), 'Same interpreter should not differ.'
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            requirements = Path(tmpdir, 'requirements.txt')
+            requirements.write_text('# Comment\npip==0.0.1 ; python_version >= "3" \\\n    --hash=sha256:abc\nnot-installed-foo==1.0\n')
+            result = environment.diff(requirements)
+            assert result.changed['pip'][1] == '0.0.1', 'Version change not detected.'
+            assert 'not-installed-foo' in result.removed, 'Missing distribution not detected.'
+
+
+    def test_diff_verify(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            site_packages = Path(tmpdir)
+            Path(site_packages, 'foo').mkdir()
+            Path(site_packages, 'foo', '__init__.py').write_text('foo = 1\n')
+            digest = base64.urlsafe_b64encode(hashlib.sha256(b'foo = 1\n').digest()).rstrip(b'=').decode('ascii')
+            dist_info = Path(site_packages, 'foo-1.0.dist-info')
+            dist_info.mkdir()
+            Path(dist_info, 'METADATA').write_text('Metadata-Version: 2.1\nName: foo\nVersion: 1.0\n\nBody\n')
+            Path(dist_info, 'RECORD').write_text(f'foo/__init__.py,sha256={digest},8\nfoo/bar.py,sha256=abc,1\nfoo-1.0.dist-info/RECORD,,\n')
+
+            distributions = dist_utils.scan([site_packages], verify=True)
+            assert distributions['foo'].version == '1.0', 'Failed to read metadata.'
+            assert distributions['foo'].corrupted == ['foo/bar.py'], 'Missing file not detected.'
+
+            Path(site_packages, 'foo', '__init__.py').write_text('foo = 2\n')
+            assert 'foo/__init__.py' in dist_utils.scan([site_packages], verify=True)['foo'].corrupted, 'Tampered file not detected.'
+
+
+    def test_diff_versions(self):
+        ours = {'foo': dist_utils.Distribution('foo', '1.0RC1'), 'bar': dist_utils.Distribution('bar', '2.0')}
+        theirs = {'foo': dist_utils.Distribution('foo', '1.0.0rc1'), 'bar': dist_utils.Distribution('bar', '2.0.1')}
+        result = dist_utils.diff(ours, theirs)
+        assert 'foo' not in result.changed, 'Equivalent versions reported as changed.'
+        assert result.changed['bar'] == ('2.0', '2.0.1'), 'Version change not detected.'
+
+
+    def test_site_packages_interpreter(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            base = Environment(str(Path(tmpdir, 'base')))
+            virtualenv.VirtualEnv(base)
+            environment = Environment('test_interpreter_env', interpreter=base.python())
+            site_packages = environment.site_packages()
+            assert site_packages and all(Path(tmpdir) in x.parents for x in site_packages), 'Site-packages of the interpreter not used.'
+            assert not environment.diff(base), 'Environment differs from the interpreter it started from.'
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
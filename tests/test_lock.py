@@ -0,0 +1,69 @@
+import os
+import shlex
+import tempfile
+import unittest
+
+from pathlib import Path
+
+from pybuild import lock
+from pybuild import virtualenv
+from pybuild.environment import Environment
+from pybuild.utils import process_utils
+
+class TestLock(unittest.TestCase):
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        os.environ['PYBUILD_CACHE_DIR'] = self._tmpdir.name
+
+
+    def tearDown(self):
+        del os.environ['PYBUILD_CACHE_DIR']
+        self._tmpdir.cleanup()
+
+
+    def test_quote(self):
+        path = str(Path(self._tmpdir.name, 'requirements with spaces.lock'))
+        assert shlex.split(process_utils.quote(path)) == [path], 'Path with spaces not quoted for the shell.'
+
+
+    def test_render(self):
+        report = {
+            'environment': {'implementation_name': 'cpython', 'python_version': '3.11', 'sys_platform': 'linux', 'platform_machine': 'x86_64'},
+            'install': [
+                {'metadata': {'name': 'six', 'version': '1.17.0'}, 'is_direct': False,
+                 'download_info': {'url': 'https://foo/six-1.17.0-py2.py3-none-any.whl', 'archive_info': {'hash': 'sha256=abc'}}}
+            ]
+        }
+        entries = lock._render(report)
+        assert entries == ['six==1.17.0 ; implementation_name == "cpython" and python_version == "3.11" and sys_platform == "linux" '
+                           'and platform_machine == "x86_64" \\\n    --hash=sha256:abc'], 'Unexpected lockfile entry.'
+
+        report['install'][0]['download_info'] = {'url': 'file:///foo', 'dir_info': {}}
+        with self.assertRaises(ValueError):
+            lock._render(report)
+
+
+    def test_lock(self):
+        environment = Environment('test_lock_env')
+        virtualenv.VirtualEnv(environment)
+        try:
+            lockfile = lock.lock(environment, ['six'], lockfile=str(Path(self._tmpdir.name, 'pybuild.lock')))
+            contents = lockfile.read_text()
+            assert 'six==' in contents and '--hash=sha256:' in contents, 'Lockfile isn\'t pinned and hashed.'
+            assert len(list(Path(self._tmpdir.name, 'lock').iterdir())) == 1, 'Resolution wasn\'t cached.'
+
+            lockfile.unlink()
+            assert lock.lock(environment, [' six'], lockfile=str(lockfile)).read_text() == contents, 'Cached resolution differs.'
+            assert lock.install_locked(environment, lockfile) == 0, 'Failed to install lockfile.'
+            assert any(x.name.startswith('six-') for x in environment.site_packages()[0].iterdir()), 'six wasn\'t installed.'
+
+            lockfile.write_text(contents.replace('# Interpreter: cpython', '# Interpreter: pypy'))
+            with self.assertRaises(ValueError):
+                lock.install_locked(environment, lockfile)
+        finally:
+            environment.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main()
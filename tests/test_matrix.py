@@ -0,0 +1,55 @@
+import sys
+import tempfile
+import unittest
+
+from pathlib import Path
+
+from pybuild import matrix
+from pybuild import pip
+
+class TestMatrix(unittest.TestCase):
+
+    def test_run(self):
+        cells = matrix.run([sys.executable], [[], ['six']], lambda x: x.python(), concurrency=2, name='test_matrix')
+        assert [x.name for x in cells] == ['test_matrix_0_0', 'test_matrix_0_1'], 'Unexpected cells.'
+        assert all(x.succeeded() for x in cells), 'Matrix cell failed.'
+        assert all(Path(x.name) in x.result.parents for x in cells), 'Cell didn\'t run inside its environment.'
+        assert all(set(x.timings) == {'setup', 'run'} for x in cells), 'Missing cell timings.'
+        assert not any(Path(x.name).exists() for x in cells), 'Cell environments weren\'t removed.'
+
+
+    def test_command(self):
+        cells = matrix.run([sys.executable], [['six']], '-c "import six"', name='test_matrix_command')
+        assert cells[0].succeeded() and cells[0].result == 0, 'Command failed inside the cell.'
+
+        cells = matrix.run([sys.executable], [[]], '-c "import not_installed_foo"', name='test_matrix_failure')
+        assert isinstance(cells[0].error, ValueError), 'Failing command not reported.'
+
+
+    def test_cache_dir(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cells = matrix.run([sys.executable], [['six']], '-c "import six"', name='test_matrix_cache', cache_dir=Path(tmpdir, 'pip cache'))
+            assert cells[0].succeeded(), 'Cache directory containing spaces broke the installation.'
+
+
+    def test_wheelhouse(self):
+        fetches = []
+        download = pip.download
+        def counting_download(*args, **kwargs):
+            fetches.append(args)
+            return download(*args, **kwargs)
+        pip.download = counting_download
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                wheelhouse = Path(tmpdir, 'wheel house')
+                cells = matrix.run([sys.executable, sys.executable], [['six'], []], '-c "import six"', concurrency=4,
+                                   name='test_matrix_wheelhouse', wheelhouse=wheelhouse)
+                assert len(fetches) == 1, 'Variant fetched more than once for the same interpreter.'
+                assert list(wheelhouse.glob('six-*')), 'Variant not downloaded into the wheelhouse.'
+                assert cells[0].succeeded() and cells[2].succeeded(), 'Cells failed to install from the wheelhouse.'
+        finally:
+            pip.download = download
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import sys
+import tempfile
+import unittest
+
+from pathlib import Path
+
+import pybuild
+
+from pybuild import plugins
+
+class TestPlugins(unittest.TestCase):
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        os.environ['PYBUILD_CACHE_DIR'] = self._tmpdir.name
+        self._site = Path(self._tmpdir.name, 'site')
+        dist_info = Path(self._site, 'pybuild_foo-1.0.dist-info')
+        dist_info.mkdir(parents=True)
+        Path(dist_info, 'entry_points.txt').write_text('[console_scripts]\nfoo = pybuild_foo:main\n\n[pybuild.modules]\nfoo = pybuild_foo\n')
+        Path(self._site, 'pybuild_foo.py').write_text('VALUE = 1\n')
+        sys.path.insert(0, str(self._site))
+
+
+    def tearDown(self):
+        sys.path.remove(str(self._site))
+        sys.modules.pop('pybuild_foo', None)
+        vars(pybuild).pop('foo', None)
+        plugins.discover(refresh=True)
+        del os.environ['PYBUILD_CACHE_DIR']
+        self._tmpdir.cleanup()
+
+
+    def test_discover(self):
+        assert plugins.discover(refresh=True)['foo'] == 'pybuild_foo', 'Registered module not discovered.'
+        assert 'pybuild_foo' not in sys.modules, 'Discovery imported the module.'
+        assert pybuild.foo.VALUE == 1, 'Registered module not reachable through pybuild.'
+        assert 'foo' in dir(pybuild), 'Registered module not listed.'
+        with self.assertRaises(AttributeError):
+            pybuild.not_registered
+
+
+    def test_cache(self):
+        plugins.discover(refresh=True)
+        plugins._registry = None
+        Path(self._site, 'pybuild_foo-1.0.dist-info', 'entry_points.txt').write_text('')
+        assert 'foo' in plugins.discover(), 'Cached discovery not used.'
+
+        caches = list(Path(self._tmpdir.name, 'plugins').iterdir())
+        assert len(caches) == 1 and caches[0].name.startswith(f'{sys.implementation.cache_tag}-'), 'Cache not keyed by prefix.'
+
+        plugins._registry = None
+        Path(self._site, 'pybuild_bar-1.0.dist-info').mkdir()
+        assert 'foo' not in plugins.discover(), 'Cache not invalidated by a new distribution.'
+
+
+    def test_unwritable_cache(self):
+        os.environ['PYBUILD_CACHE_DIR'] = '/proc/nonexistent/pybuild'
+        plugins._registry = None
+        assert not hasattr(pybuild, 'not_registered'), 'Unregistered module reported.'
+        assert 'foo' in dir(pybuild), 'Registered module not discovered without a cache.'
+        with self.assertRaises(ImportError):
+            from pybuild import not_registered
+
+
+if __name__ == '__main__':
+    unittest.main()